@@ -2,18 +2,29 @@ r"""
 Helper functions for processing images.
 """
 
+import os
+import threading
 import cv2
 import numpy as np
 import matplotlib
 import matplotlib.pyplot as plt
-from functools import reduce
+from functools import lru_cache
 from scipy.optimize import curve_fit, minimize
-from scipy.ndimage import binary_erosion
+from scipy.fft import rfft2, irfft2, next_fast_len
+from scipy.ndimage import binary_erosion, maximum_filter
 import warnings
 try:
     import cupy as cp   # type: ignore
 except ImportError:
     cp = np
+try:
+    import numba        # type: ignore
+except ImportError:
+    numba = None
+try:
+    import joblib       # type: ignore
+except ImportError:
+    joblib = None
 
 from slmsuite.holography.toolbox import format_2vectors, _process_grid
 from slmsuite.holography.toolbox.phase import zernike_sum, laguerre_gaussian
@@ -43,6 +54,19 @@ def _coordinates(width, centered=False):
     return xs
 
 
+@lru_cache(maxsize=32)
+def _offset_grid(size, centered=False):
+    """
+    Read-only coordinate offsets of shape ``(1, 1, w)`` and ``(1, h, 1)`` for a region of
+    ``size`` ``(w, h)``, cached as :meth:`take()` is often called with the same ``size``.
+    """
+    edge_x = np.reshape(_coordinates(size[0], centered), (1, 1, size[0]))
+    edge_y = np.reshape(_coordinates(size[1], centered), (1, size[1], 1))
+    edge_x.setflags(write=False)
+    edge_y.setflags(write=False)
+    return edge_x, edge_y
+
+
 def _generate_grid(w_x, w_y, centered=False, integer=False):
     """
 
@@ -132,23 +156,21 @@ def take(
     if xp is None:
         xp = np
 
-    # Prepare helper variables. Future: consider caching for speed, if not negligible.
-    edge_x = _coordinates(size[0], centered)
-    edge_y = _coordinates(size[1], centered)
-
-    region_x, region_y = np.meshgrid(edge_x, edge_y)
-
-    # Get the lists for the integration regions.
-    integration_x = np.rint(np.add(
-        region_x.ravel()[:, np.newaxis].T, vectors[:][0][:, np.newaxis]
-    )).astype(int)
-    integration_y = np.rint(np.add(
-        region_y.ravel()[:, np.newaxis].T, vectors[:][1][:, np.newaxis]
-    )).astype(int)
-
     images = xp.array(images, copy=(False if np.__version__[0] == '1' else None))
     shape = xp.shape(images)
 
+    # Prepare helper variables.
+    edge_x, edge_y = _offset_grid(size, centered)
+
+    # Get the lists for the integration regions. These are of shape (vector_count, 1, w)
+    # and (vector_count, h, 1), and are broadcast together upon indexing.
+    integration_x = np.rint(
+        edge_x + vectors[0][:, np.newaxis, np.newaxis]
+    ).astype(np.intp, copy=False)
+    integration_y = np.rint(
+        edge_y + vectors[1][:, np.newaxis, np.newaxis]
+    ).astype(np.intp, copy=False)
+
     if clip:  # Prevent out-of-range errors by clipping.
         mask = (
             (integration_x < 0) | (integration_x >= shape[-1]) |
@@ -188,15 +210,14 @@ def take(
             raise RuntimeError("Unexpected shape for images: {}".format(shape))
 
         if clip:  # Set values that were out of range to nan instead of erroring.
-            try:  # If the datatype of result is incompatible with nan, set to zero instead.
-                result[:, mask] = np.nan
-            except:
-                result[:, mask] = 0
+            # If the datatype of result is incompatible with nan, set to zero instead.
+            fill = np.nan if np.issubdtype(result.dtype, np.inexact) else 0
+            xp.copyto(result, fill, where=xp.asarray(mask)[np.newaxis])
         else:
             pass
 
         if integrate:  # Sum over the integration axis.
-            return xp.squeeze(xp.sum(result.astype(float), axis=-1))
+            return xp.squeeze(xp.sum(result.astype(float), axis=(-2, -1)))
         else:  # Reshape the integration axis.
             return xp.reshape(result, (vectors.shape[1], size[1], size[0]))
 
@@ -213,44 +234,34 @@ def take_plot(images, shape=None, separate_axes=False):
         Shape of the subplots.
         If ``None``, the shape is determined by the number of images (smallest square).
     separate_axes : bool
-        If ``True``, each image is plotted in a separate subplot.
-        If ``False``, uses :meth:`take_tile()` to plot all images on a single axes.
+        If ``True``, each image is plotted in a separate cell of a grid in a new figure.
+        If ``False``, uses :meth:`take_tile()` to plot all images on the current axes.
+        In both cases, the images are tiled into a single mosaic such that only one
+        :meth:`matplotlib.pyplot.imshow` call is needed, which is much faster than
+        making a subplot for each of many images.
     """
-    # Gather helper variables and set the min and max of all the subplots.
-    (img_count, sy, sx) = np.shape(images)
+    # Gather helper variables.
+    (_, sy, sx) = np.shape(images)
+    _, (M, N) = _take_parse_shape(images, shape)
 
     if separate_axes:
-        img_count, (M, N) = _take_parse_shape(images, shape)
-
-        sx = sx / 2.0 - 0.5
-        sy = sy / 2.0 - 0.5
-        extent = (-sx, sx, -sy, sy)
-
-        vmin = np.nanmin(images)
-        vmax = np.nanmax(images)
-
-        # Make the figure and subplots.
         plt.figure(figsize=(12, 12))
 
-        for x in range(img_count):
-            ax = plt.subplot(M, M, x + 1)
+    plt.imshow(
+        take_tile(images, shape),
+        vmin=np.nanmin(images),
+        vmax=np.nanmax(images),
+        interpolation='none'
+    )
+    ax = plt.gca()
 
-            ax.imshow(
-                images[x, :, :],
-                vmin=vmin,
-                vmax=vmax,
-                extent=extent,
-                interpolation='none'
-            )
-            ax.axes.xaxis.set_visible(False)
-            ax.axes.yaxis.set_visible(False)
-    else:
-        plt.imshow(
-            take_tile(images, shape),
-            interpolation='none'
-        )
-        ax.axes.xaxis.set_visible(False)
-        ax.axes.yaxis.set_visible(False)
+    if separate_axes:
+        # Outline the cells of the mosaic.
+        ax.vlines(np.arange(1, N) * sx - .5, -.5, M * sy - .5, colors="w", linewidth=2)
+        ax.hlines(np.arange(1, M) * sy - .5, -.5, N * sx - .5, colors="w", linewidth=2)
+
+    ax.axes.xaxis.set_visible(False)
+    ax.axes.yaxis.set_visible(False)
 
 
 def _take_parse_shape(images, shape=None):
@@ -288,8 +299,10 @@ def take_tile(images, shape=None):
     (img_count, sy, sx) = np.shape(images)
     img_count, (M, N) = _take_parse_shape(images, shape)
 
-    result = np.empty((M*N, sy, sx), images.dtype)
-    result[:img_count, :, :] = images[:, :, :]
+    # Empty cells are nan, or zero if the datatype does not support nan.
+    fill = np.nan if np.issubdtype(images.dtype, np.inexact) else 0
+    result = np.full((M*N, sy, sx), fill, images.dtype)
+    result[:img_count, :, :] = images[:img_count, :, :]
 
     return result.reshape(M, N, sy, sx).transpose(0, 2, 1, 3).reshape(M*sy, N*sx)
 
@@ -396,6 +409,147 @@ def image_relative_strehl(images):
     return np.amax(images, axis=(1,2)) / np.sum(images, axis=(1,2))
 
 
+def _image_sum(images, nansum=False):
+    """
+    Sums each image in a stack of shape ``(image_count, h, w)``. Uses OpenCV's SIMD
+    reductions for common camera datatypes, which are much faster than
+    :meth:`numpy.sum()` on integer data. The result has the dtype of :meth:`numpy.sum()`.
+    """
+    (img_count, w_y, w_x) = images.shape
+
+    if nansum:
+        return np.nansum(images, axis=(1, 2))
+
+    # The OpenCV reductions return int32 or float64, so cast to the dtype numpy would use.
+    dtype = np.sum(images[:0], axis=(1, 2)).dtype
+
+    if images.dtype == np.uint8 and w_x * w_y < 2 ** 23:
+        # Sum all the images in one call. This is exact in int32 for < 2**31 / 255 pixels.
+        return cv2.reduce(
+            np.ascontiguousarray(np.reshape(images, (img_count, -1))),
+            1,
+            cv2.REDUCE_SUM,
+            dtype=cv2.CV_32S
+        )[:, 0].astype(dtype)
+    elif (
+        (images.dtype in (np.uint8, np.uint16) and w_x * w_y >= 4096)
+        or (images.dtype == np.float32 and w_x * w_y >= 2 ** 16)
+    ):
+        # Large images amortize the cost of looping over images. For float32,
+        # numpy's pairwise sum is competitive until the images are much larger.
+        # Integer sums are exact in float64 for < 2**53 / 2**16 pixels.
+        return np.array(
+            [cv2.sumElems(np.ascontiguousarray(image))[0] for image in images], dtype=dtype
+        )
+    else:
+        return np.sum(images, axis=(1, 2))
+
+
+def _reciprocal(normalization):
+    """
+    Reciprocal of ``normalization``, or zero where ``normalization`` is zero.
+    Integer ``normalization`` is treated as float.
+    """
+    nonzero = normalization != 0
+    return np.where(nonzero, 1 / np.where(nonzero, normalization, 1), 0)
+
+
+def _numba_dtype(dtype):
+    """
+    Whether the numba kernels can be compiled for arrays of ``dtype``.
+    Only real integer, ``float32``, and ``float64`` data are supported;
+    other types (``bool``, ``float16``, complex, ...) fall back to numpy.
+    """
+    return numba is not None and (
+        np.dtype(dtype).kind in "iu" or np.dtype(dtype) in (np.float32, np.float64)
+    )
+
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _moment_numba(images, x_grid, y_grid):
+        """
+        Fused multiply and reduction of :meth:`image_moment()` with separable trial
+        functions ``x_grid`` of shape ``(image_count, w)`` and
+        ``y_grid`` of shape ``(image_count, h)``.
+        """
+        (img_count, w_y, w_x) = images.shape
+        result = np.zeros(img_count)
+
+        for i in numba.prange(img_count):
+            for y in range(w_y):
+                row = 0.0
+                for x in range(w_x):
+                    row += images[i, y, x] * x_grid[i, x]
+                result[i] += row * y_grid[i, y]
+
+        return result
+
+    # Same as above, but treating nan as zero. fastmath would assume away the nan check.
+    @numba.njit(parallel=True, cache=True)
+    def _moment_nansum_numba(images, x_grid, y_grid):
+        """
+        :meth:`numpy.nansum()` variant of :meth:`_moment_numba()`.
+        """
+        (img_count, w_y, w_x) = images.shape
+        result = np.zeros(img_count)
+
+        for i in numba.prange(img_count):
+            for y in range(w_y):
+                row = 0.0
+                for x in range(w_x):
+                    value = images[i, y, x]
+                    if not np.isnan(value):
+                        row += value * x_grid[i, x]
+                result[i] += row * y_grid[i, y]
+
+        return result
+
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _stats_numba(images, nansum):
+        """
+        Single-pass raw moments :math:`M_{00}`, :math:`M_{10}`, :math:`M_{01}`,
+        :math:`M_{20}`, :math:`M_{02}`, :math:`M_{11}` for :meth:`image_stats()`.
+        """
+        (img_count, w_y, w_x) = images.shape
+        c_x = (w_x - 1) / 2
+        c_y = (w_y - 1) / 2
+        result = np.zeros((6, img_count))
+
+        for i in numba.prange(img_count):
+            m00 = m10 = m01 = m20 = m02 = m11 = 0.0
+
+            for y in range(w_y):
+                d_y = y - c_y
+                row = row_x = row_xx = 0.0
+                for x in range(w_x):
+                    value = images[i, y, x]
+                    if nansum and np.isnan(value):
+                        continue
+                    d_x = x - c_x
+                    row += value
+                    row_x += value * d_x
+                    row_xx += value * d_x * d_x
+
+                m00 += row
+                m10 += row_x
+                m01 += row * d_y
+                m20 += row_xx
+                m02 += row * d_y * d_y
+                m11 += row_x * d_y
+
+            result[0, i] = m00
+            result[1, i] = m10
+            result[2, i] = m01
+            result[3, i] = m20
+            result[4, i] = m02
+            result[5, i] = m11
+
+        return result
+
+
 def image_moment(images, moment=(1, 0), centers=(0, 0), grid=None, normalize=True, nansum=False):
     r"""
     Computes the given `moment <https://en.wikipedia.org/wiki/Moment_(mathematics)>`_
@@ -476,21 +630,14 @@ def image_moment(images, moment=(1, 0), centers=(0, 0), grid=None, normalize=Tru
     images = np.array(images, copy=(False if np.__version__[0] == '1' else None))
     if len(images.shape) == 2:
         images = np.reshape(images, (1, images.shape[0], images.shape[1]))
-    (img_count, w_y, w_x) = images.shape
+    img_count = images.shape[0]
 
     moment = (int(moment[0]), int(moment[1]))
 
-    if nansum:
-        np_sum = np.nansum
-    else:
-        np_sum = np.sum
-
     # Handle normalization.
     if normalize:
-        normalization = np_sum(images, axis=(1, 2), keepdims=False)
-        reciprocal = np.reciprocal(
-            normalization, where=normalization != 0, out=np.zeros(img_count,)
-        )
+        normalization = _image_sum(images, nansum=nansum)
+        reciprocal = _reciprocal(normalization)
     else:
         reciprocal = 1
 
@@ -498,64 +645,158 @@ def image_moment(images, moment=(1, 0), centers=(0, 0), grid=None, normalize=Tru
         if normalize:
             return np.ones((img_count,))
         else:
-            return np_sum(images, axis=(1, 2), keepdims=False)
+            return _image_sum(images, nansum=nansum)
     else:
-        if len(np.shape(centers)) == 2:
-            c_x = np.reshape(centers[0], (img_count, 1, 1))
-            c_y = np.reshape(centers[1], (img_count, 1, 1))
-        elif len(np.shape(centers)) == 1:
-            c_x = centers[0]
-            c_y = centers[1]
-
-        # Parse grid.
-        if grid is None or np.isscalar(grid) or (np.isscalar(grid[0]) and np.isscalar(grid[1])):
-            # Default to the pixel grid.
-            if moment[0] != 0:
-                x_grid = np.reshape(np.arange(w_x) - _center(w_x), (1, 1, w_x)) - c_x
-                if moment[0] != 1:
-                    x_grid = np.power(x_grid, moment[0], out=x_grid)
-            else:
-                x_grid = 0
+        x_grid, y_grid = _moment_grids(images.shape, centers, grid)
 
-            if moment[1] != 0:
-                y_grid = np.reshape(np.arange(w_y) - _center(w_y), (1, w_y, 1)) - c_y
-                if moment[1] != 1:
-                    y_grid = np.power(y_grid, moment[1], out=y_grid)
-            else:
-                y_grid = 0
+        if moment[0] == 0:
+            x_grid = None
+        elif moment[0] > 1:
+            x_grid = np.power(x_grid, moment[0])
 
-            # Handle the dx, dy option.
-            if grid is not None:
-                if np.isscalar(grid):
-                    x_grid *= grid[0]
-                    y_grid *= grid[1]
-                else:
-                    x_grid *= grid
-                    y_grid *= grid
-        else:
-            x_grid, y_grid = grid
-
-            if len(np.shape(x_grid)) == 2:                          # 2D grids.
-                x_grid = np.reshape(x_grid, (1, w_y, w_x)) - c_x
-                y_grid = np.reshape(y_grid, (1, w_y, w_x)) - c_y
-            elif len(np.shape(x_grid)) == 1:                        # 1D grids.
-                x_grid = np.reshape(x_grid, (1, 1, w_x)) - c_x
-                y_grid = np.reshape(y_grid, (1, w_y, 1)) - c_y
-            elif len(np.shape(x_grid)) == 3:
-                pass
+        if moment[1] == 0:
+            y_grid = None
+        elif moment[1] > 1:
+            y_grid = np.power(y_grid, moment[1])
+
+        return _image_moment_kernel(images, x_grid, y_grid, nansum=nansum) * reciprocal
+
+
+def _moment_grids(shape, centers=(0, 0), grid=None):
+    """
+    Parses the ``centers`` and ``grid`` arguments of :meth:`image_moment()` into
+    first order trial functions for images of ``shape`` ``(image_count, h, w)``.
+    The returned ``x_grid`` and ``y_grid`` are broadcastable to the images.
+    """
+    (img_count, w_y, w_x) = shape
+
+    if len(np.shape(centers)) == 2:
+        c_x = np.reshape(centers[0], (img_count, 1, 1))
+        c_y = np.reshape(centers[1], (img_count, 1, 1))
+    else:
+        c_x = centers[0]
+        c_y = centers[1]
+
+    # Parse grid.
+    if grid is None or np.isscalar(grid) or (np.isscalar(grid[0]) and np.isscalar(grid[1])):
+        # Default to the (cached) pixel grid.
+        x_grid, y_grid = _offset_grid((w_x, w_y), centered=True)
+
+        # Handle the dx, dy option.
+        if grid is not None:
+            if np.isscalar(grid):
+                x_grid = x_grid * grid
+                y_grid = y_grid * grid
             else:
-                raise ValueError(f"Could not parse grid of shape {x_grid.shape}")
+                x_grid = x_grid * grid[0]
+                y_grid = y_grid * grid[1]
+    else:
+        x_grid, y_grid = grid
+
+        if len(np.shape(x_grid)) == 2:                          # 2D grids.
+            x_grid = np.reshape(x_grid, (1, w_y, w_x))
+            y_grid = np.reshape(y_grid, (1, w_y, w_x))
+        elif len(np.shape(x_grid)) == 1:                        # 1D grids.
+            x_grid = np.reshape(x_grid, (1, 1, w_x))
+            y_grid = np.reshape(y_grid, (1, w_y, 1))
+        elif len(np.shape(x_grid)) != 3:
+            raise ValueError(f"Could not parse grid of shape {np.shape(x_grid)}")
+
+    # Shift by the centers. This also avoids modifying the original memory.
+    return x_grid - c_x, y_grid - c_y
+
+
+# Minimum total pixel count for which image_moment() splits the stack across threads.
+_PARALLEL_MIN_SIZE = 2 ** 22
+
 
-            # Don't modify original memory.
-            if moment[0] > 1: x_grid = np.power(x_grid, moment[0])
-            if moment[1] > 1: y_grid = np.power(y_grid, moment[1])
+def _image_moment_kernel(images, x_grid, y_grid, nansum=False, parallel=True):
+    """
+    Integrates a stack of ``images`` of shape ``(image_count, h, w)`` against the trial
+    functions ``x_grid`` and ``y_grid``, either of which can be ``None`` if unused.
+    This is the core of :meth:`image_moment()`, without parsing or normalization.
+    """
+    (img_count, w_y, w_x) = images.shape
 
-        if moment[1] == 0:      # Only-x case.
-            return np_sum(images * x_grid * reciprocal, axis=(1, 2), keepdims=False)
-        elif moment[0] == 0:    # Only-y case.
-            return np_sum(images * y_grid * reciprocal, axis=(1, 2), keepdims=False)
-        else:                   # Shear case.
-            return np_sum(images * x_grid * y_grid * reciprocal, axis=(1, 2), keepdims=False)
+    # Without numba, split large stacks across a thread pool. Each image is
+    # independent, and the numpy reductions release the GIL. Small stacks are not
+    # worth the dispatch overhead.
+    cpu_count = os.cpu_count() or 1
+    if (
+        parallel
+        and numba is None
+        and joblib is not None
+        and cpu_count > 1
+        and img_count >= 2 * cpu_count
+        and images.size >= _PARALLEL_MIN_SIZE
+    ):
+        bounds = np.linspace(0, img_count, cpu_count + 1).astype(int)
+        slices = [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+        def chunk(grid, s):
+            return grid if grid is None or np.shape(grid)[0] == 1 else grid[s]
+
+        results = joblib.Parallel(n_jobs=cpu_count, prefer="threads")(
+            joblib.delayed(_image_moment_kernel)(
+                images[s], chunk(x_grid, s), chunk(y_grid, s), nansum=nansum, parallel=False
+            )
+            for s in slices
+        )
+        return np.concatenate(results)
+
+    # Match single precision images, such that BLAS does not silently upcast them.
+    dtype = np.float32 if images.dtype == np.float32 else np.float64
+
+    # If the trial functions are separable, avoid a full-size temporary.
+    x_separable = x_grid is None or np.shape(x_grid)[1] == 1
+    y_separable = y_grid is None or np.shape(y_grid)[2] == 1
+
+    if x_separable and y_separable:
+        x_weights = np.ones((1, w_x)) if x_grid is None else np.reshape(x_grid, (-1, w_x))
+        y_weights = np.ones((1, w_y)) if y_grid is None else np.reshape(y_grid, (-1, w_y))
+
+        if _numba_dtype(images.dtype):
+            # Use the fused numba kernel.
+            kernel = _moment_nansum_numba if nansum else _moment_numba
+            return kernel(
+                images,
+                np.broadcast_to(x_weights.astype(np.float64, copy=False), (img_count, w_x)),
+                np.broadcast_to(y_weights.astype(np.float64, copy=False), (img_count, w_y)),
+            )
+        elif not nansum:
+            # Otherwise, reduce along x via a (batched) BLAS matmul, then along y.
+            x_weights = x_weights.astype(dtype, copy=False)
+            x_reduced = np.matmul(images, x_weights[:, :, np.newaxis])[:, :, 0]
+            return np.sum(x_reduced * y_weights, axis=1)
+
+    if y_grid is None:      # Only-x case.
+        weights = x_grid
+    elif x_grid is None:    # Only-y case.
+        weights = y_grid
+    elif not nansum and max(np.shape(x_grid)[0], np.shape(y_grid)[0]) > 1:
+        # Shear case with per-image trial functions. Contract all three operands in
+        # a single pass rather than materializing the (image_count, h, w) product.
+        shape = (img_count, w_y, w_x)
+        return np.einsum(
+            "nji,nji,nji->n",
+            images,
+            np.broadcast_to(np.asarray(x_grid, dtype=dtype), shape),
+            np.broadcast_to(np.asarray(y_grid, dtype=dtype), shape),
+        )
+    else:                   # Shear case with a shared (h, w) trial function.
+        weights = x_grid * y_grid
+    weights = np.broadcast_to(
+        np.asarray(weights, dtype=dtype), (np.shape(weights)[0], w_y, w_x)
+    )
+
+    if nansum:
+        return np.nansum(images * weights, axis=(1, 2), keepdims=False)
+    elif weights.shape[0] == 1:
+        # Shared trial function: a single (image_count, h*w) @ (h*w,) BLAS product.
+        return np.tensordot(images, weights[0], axes=2)
+    else:
+        # Trial function per image.
+        return np.einsum("nji,nji->n", images, weights, optimize=True)
 
 
 def image_normalization(images, nansum=False):
@@ -619,9 +860,7 @@ def image_normalize(images, nansum=False, remove_field=False):
         else:
             return images / normalization
     else:
-        reciprocal = np.reciprocal(
-            normalization, where=normalization != 0, out=np.zeros(len(normalization))
-        )
+        reciprocal = _reciprocal(normalization)
         return images * np.reshape(reciprocal, (len(normalization), 1, 1))
 
 
@@ -661,15 +900,24 @@ def image_positions(images, grid=None, normalize=True, nansum=False):
     numpy.ndarray
         Stack of :math:`M_{10}`, :math:`M_{01}` in an array of shape ``(2, image_count)``.
     """
+    images = np.array(images, copy=(False if np.__version__[0] == '1' else None))
+    if len(images.shape) == 2:
+        images = np.reshape(images, (1, images.shape[0], images.shape[1]))
+
+    # Normalize the reduced moments rather than copying the normalized images.
     if normalize:
-        images = image_normalize(images, nansum=nansum)
+        reciprocal = _reciprocal(_image_sum(images, nansum=nansum))
+    else:
+        reciprocal = 1
+
+    x_grid, y_grid = _moment_grids(images.shape, grid=grid)
 
     return np.vstack(
         (
-            image_moment(images, (1, 0), grid=grid, normalize=False, nansum=nansum),
-            image_moment(images, (0, 1), grid=grid, normalize=False, nansum=nansum),
+            _image_moment_kernel(images, x_grid, None, nansum=nansum),
+            _image_moment_kernel(images, None, y_grid, nansum=nansum),
         )
-    )
+    ) * reciprocal
 
 
 def image_centroids(images, grid=None, normalize=True, nansum=False):
@@ -741,21 +989,31 @@ def image_variances(images, centers=None, grid=None, normalize=True, nansum=Fals
         Stack of :math:`M_{20}` and :math:`M_{02}`
         in an array of shape ``(2, image_count)``.
     """
+    images = np.array(images, copy=(False if np.__version__[0] == '1' else None))
+    if len(images.shape) == 2:
+        images = np.reshape(images, (1, images.shape[0], images.shape[1]))
+
+    # Normalize the reduced moments rather than copying the normalized images.
     if normalize:
-        images = image_normalize(images, nansum=nansum)
+        reciprocal = _reciprocal(_image_sum(images, nansum=nansum))
+    else:
+        reciprocal = 1
 
     if centers is None:
-        centers = image_positions(images, normalize=False, nansum=nansum)
+        centers = image_positions(images, grid=grid, normalize=False, nansum=nansum) * reciprocal
+
+    # Build the centered trial functions once for all three moments.
+    x_grid, y_grid = _moment_grids(images.shape, centers, grid)
 
-    m20 = image_moment(images, (2, 0), centers=centers, grid=grid, normalize=False, nansum=nansum)
-    m02 = image_moment(images, (0, 2), centers=centers, grid=grid, normalize=False, nansum=nansum)
+    m20 = _image_moment_kernel(images, np.square(x_grid), None, nansum=nansum)
+    m02 = _image_moment_kernel(images, None, np.square(y_grid), nansum=nansum)
 
     if exclude_shear:
-        return np.vstack((m20, m02))
+        return np.vstack((m20, m02)) * reciprocal
     else:
-        m11 = image_moment(images, (1, 1), centers=centers, grid=grid, normalize=False, nansum=nansum)
+        m11 = _image_moment_kernel(images, x_grid, y_grid, nansum=nansum)
 
-        return np.vstack((m20, m02, m11))
+        return np.vstack((m20, m02, m11)) * reciprocal
 
 
 def image_std(images, centers=None, grid=None, normalize=True, nansum=False):
@@ -763,6 +1021,93 @@ def image_std(images, centers=None, grid=None, normalize=True, nansum=False):
     return np.sqrt(image_variances(images, centers, grid, normalize, nansum, exclude_shear=True))
 
 
+def image_stats(images, nansum=False):
+    r"""
+    Computes the normalization, positions, and variances of a stack of images in a single
+    pass over the data. This is equivalent to, but faster than, successive calls to
+    :meth:`image_normalization()`, :meth:`image_positions()`, and
+    :meth:`image_variances()` on the default pixel grid.
+    The central second order moments are derived from the raw moments via
+    :math:`\left<(x - \left<x\right>)^2\right> = \left<x^2\right> - \left<x\right>^2`.
+
+    Parameters
+    ----------
+    images : numpy.ndarray
+        A matrix in the style of the output of :meth:`take()`, with shape ``(image_count, h, w)``, where
+        ``(h, w)`` is the width and height of the 2D images and ``image_count`` is the number of
+        images. A single image is interpreted correctly as ``(1, h, w)`` even if
+        ``(h, w)`` is passed.
+    nansum : bool
+        Whether to use :meth:`numpy.nansum()` in place of :meth:`numpy.sum()`.
+
+    Returns
+    -------
+    numpy.ndarray
+        Stack of the normalization, :math:`M_{10}`, :math:`M_{01}`,
+        :math:`M_{20}`, :math:`M_{02}`, and :math:`M_{11}`
+        in an array of shape ``(6, image_count)``.
+    """
+    images = np.array(images, copy=(False if np.__version__[0] == '1' else None))
+    if len(images.shape) == 2:
+        images = np.reshape(images, (1, images.shape[0], images.shape[1]))
+    (img_count, w_y, w_x) = images.shape
+
+    # Gather the raw moments.
+    if _numba_dtype(images.dtype):
+        stats = _stats_numba(images, nansum)
+    else:
+        np_sum = np.nansum if nansum else np.sum
+
+        x_grid = _coordinates(w_x, centered=True)
+        y_grid = _coordinates(w_y, centered=True)
+
+        # Reduce to projections first, such that only the shear needs a full pass.
+        x_projection = np_sum(images, axis=1)
+        y_projection = np_sum(images, axis=2)
+
+        stats = np.vstack((
+            np.sum(x_projection, axis=1),
+            np.matmul(x_projection, x_grid),
+            np.matmul(y_projection, y_grid),
+            np.matmul(x_projection, np.square(x_grid)),
+            np.matmul(y_projection, np.square(y_grid)),
+            np_sum(
+                images * np.reshape(x_grid, (1, 1, w_x)) * np.reshape(y_grid, (1, w_y, 1)),
+                axis=(1, 2)
+            ),
+        ))
+
+    # Normalize, then convert to central moments.
+    reciprocal = _reciprocal(stats[0])
+    stats[1:] *= reciprocal
+
+    stats[3] -= np.square(stats[1])
+    stats[4] -= np.square(stats[2])
+    stats[5] -= stats[1] * stats[2]
+
+    return stats
+
+
+def _eig2x2(variances):
+    r"""
+    Returns the eigenvalues ``(eig_plus, eig_minus)`` of the symmetric
+    :math:`2 \times 2` matrices given by the output of :meth:`image_variances()`.
+    """
+    m20 = variances[0, :]
+    m02 = variances[1, :]
+    m11 = variances[2, :]
+
+    # We can use a trick for eigenvalue calculations of 2x2 matrices to avoid
+    # more complicated calculations.
+    half_trace = (m20 + m02) / 2
+    determinant = m20 * m02 - m11 * m11
+
+    # Clip roundoff for near-circular spots, which would otherwise produce nan.
+    eig_half_difference = np.sqrt(np.maximum(half_trace * half_trace - determinant, 0))
+
+    return half_trace + eig_half_difference, half_trace - eig_half_difference
+
+
 def image_ellipticity(variances):
     r"""
     Given the output of :meth:`image_variances()`,
@@ -804,19 +1149,7 @@ def image_ellipticity(variances):
     numpy.ndarray
         Array of ellipticities for the given moments in an array of shape ``(image_count,)``.
     """
-    m20 = variances[0, :]
-    m02 = variances[1, :]
-    m11 = variances[2, :]
-
-    # We can use a trick for eigenvalue calculations of 2x2 matrices to avoid
-    # more complicated calculations.
-    half_trace = (m20 + m02) / 2
-    determinant = m20 * m02 - m11 * m11
-
-    eig_half_difference = np.sqrt(np.square(half_trace) - determinant)
-
-    eig_plus = half_trace + eig_half_difference
-    eig_minus = half_trace - eig_half_difference
+    eig_plus, eig_minus = _eig2x2(variances)
 
     return 1 - (eig_minus / eig_plus)
 
@@ -867,15 +1200,10 @@ def image_ellipticity_angle(variances):
         For perfectly circular spots, zero is returned.
         Shape ``(image_count,)``.
     """
-    m20 = variances[0, :]
     m02 = variances[1, :]
     m11 = variances[2, :]
 
-    # Some quick math (see image_ellipticity).
-    half_trace = (m20 + m02) / 2
-    determinant = m20 * m02 - m11 * m11
-
-    eig_plus = half_trace + np.sqrt(np.square(half_trace) - determinant)
+    eig_plus, _ = _eig2x2(variances)
 
     # We know that M * v = eig_plus * v. This yields a system of equations:
     #   m20 * x + m11 * y = eig_plus * x
@@ -885,7 +1213,7 @@ def image_ellipticity_angle(variances):
     return np.arctan2(eig_plus - m02, m11, where=m11 != 0, out=np.zeros_like(m11))
 
 
-def image_fit(images, grid=None, function=gaussian2d, guess=None, plot=False):
+def image_fit(images, grid=None, function=gaussian2d, guess=None, plot=False, n_jobs=1):
     """
     Fit each image in a stack of images to a 2D ``function``.
 
@@ -917,6 +1245,11 @@ def image_fit(images, grid=None, function=gaussian2d, guess=None, plot=False):
     show : bool
         Whether or not to call :meth:`matplotlib.pyplot.show` after generating
         the plot.
+    n_jobs : int
+        Number of processes to distribute the fits across, if :mod:`joblib` is installed.
+        ``-1`` uses all cores. Defaults to ``1``, which fits serially. Fits are also done
+        serially when plotting or for small stacks, where the overhead of starting
+        worker processes dominates.
 
     Returns
     -------
@@ -940,9 +1273,12 @@ def image_fit(images, grid=None, function=gaussian2d, guess=None, plot=False):
     (image_count, w_y, w_x) = images.shape
     img_shape = (w_y, w_x)
 
-    if grid is None:
+    default_grid = grid is None
+    if default_grid:
         grid = _generate_grid(w_x, w_y, centered=True)
-    grid_ravel = (np.ravel(grid[0]), np.ravel(grid[1]))
+    # Stack the grid once as the contiguous float64 array which curve_fit would
+    # otherwise rebuild for every image.
+    grid_ravel = np.vstack((np.ravel(grid[0]), np.ravel(grid[1]))).astype(float, copy=False)
 
     # Number of fit parameters the function accepts (minus 1 for xy).
     param_count =  function.__code__.co_argcount - 1
@@ -954,9 +1290,15 @@ def image_fit(images, grid=None, function=gaussian2d, guess=None, plot=False):
     # Construct guesses.
     if guess is None or guess is True:
         if function is gaussian2d:
-            images_normalized = image_normalize(images, remove_field=True)
-            centers = image_positions(images_normalized, grid=grid, normalize=False)
-            variances = image_variances(images_normalized, centers=centers, grid=grid, normalize=False)
+            if default_grid:
+                # Gather all the moments in one pass.
+                stats = image_stats(image_remove_field(images))
+                centers = stats[1:3, :]
+                variances = stats[3:, :]
+            else:
+                images_field = image_remove_field(images)
+                centers = image_positions(images_field, grid=grid)
+                variances = image_variances(images_field, centers=centers, grid=grid)
 
             maxs = np.amax(images, axis=(1, 2))
             mins = np.amin(images, axis=(1, 2))
@@ -974,44 +1316,28 @@ def image_fit(images, grid=None, function=gaussian2d, guess=None, plot=False):
             else:
                 warnings.warn(message)
 
-    # Fit and plot each image.
-    for img_idx in range(image_count):
-        img = images[img_idx, :, :].ravel()
-        grid_ravel_ = grid_ravel
-
-        # Deal with nans.
-        undefined = np.isnan(img)
-        if np.any(undefined):
-            defined = np.logical_not(undefined)
-            img = img[defined]
-            grid_ravel_ = (grid_ravel[0][defined], grid_ravel[1][defined])
-
-        # Get guess.
-        p0 = None if guess is None else guess[img_idx]
-
-        # Attempt fit.
-        fit_succeeded = True
-        popt = None
-        perr = None
-
-        try:
-            popt, pcov = curve_fit(function, grid_ravel_, img, ftol=1e-5, p0=p0,)
-            perr = np.sqrt(np.diag(pcov))
-        except RuntimeError:    # The fit failed if scipy says so.
-            fit_succeeded = False
-        else:                   # The fit failed if any of the parameters aren't finite.
-            if np.any(np.logical_not(np.isfinite(popt))):
-                fit_succeeded = False
-
-        if fit_succeeded:   # Calculate r2.
-            ss_res = np.sum(np.square(img - function(grid_ravel_, *popt)))
-            ss_tot = np.sum(np.square(img - np.mean(img)))
-            r2 = 1 - (ss_res / ss_tot)
-        else:               # r2 is nan and the fit parameters are the guess or nan.
-            popt = p0 if p0 is not None else np.full(param_count, np.nan)
-            r2 = np.nan
-            perr = np.nan
+    # Fit each image, in parallel if possible.
+    images_ravel = np.ascontiguousarray(np.reshape(images, (image_count, -1)), dtype=float)
+    fit_args = (
+        (
+            images_ravel[img_idx],
+            grid_ravel,
+            function,
+            None if guess is None else guess[img_idx],
+            param_count,
+            plot
+        )
+        for img_idx in range(image_count)
+    )
 
+    if joblib is not None and n_jobs != 1 and not plot and image_count >= 64:
+        fits = joblib.Parallel(n_jobs=n_jobs, prefer="processes")(
+            joblib.delayed(_image_fit_single)(*args) for args in fit_args
+        )
+    else:
+        fits = (_image_fit_single(*args) for args in fit_args)
+
+    for img_idx, (r2, popt, perr, model) in enumerate(fits):
         # Populate results.
         result[img_idx, 0] = r2
         result[img_idx, 1:(param_count+1)] = popt
@@ -1020,12 +1346,15 @@ def image_fit(images, grid=None, function=gaussian2d, guess=None, plot=False):
         # Plot.
         if plot:
             # Data.
-            data = np.reshape(img, img_shape)
+            data = np.reshape(images[img_idx], img_shape)
+            p0 = None if guess is None else guess[img_idx]
             if p0 is not None:
                 guess_ = np.reshape(function(grid_ravel, *p0), img_shape)
             else:
                 guess_ = np.zeros(img_shape)
-            result_ = np.reshape(function(grid_ravel, *popt), img_shape)
+            if model is None:   # The fit failed; show the guess (or nan).
+                model = function(grid_ravel, *popt)
+            result_ = np.reshape(model, img_shape)
             vmin = np.min((
                 np.min(data),
                 np.min(guess_) if p0 is not None else np.inf,
@@ -1053,6 +1382,55 @@ def image_fit(images, grid=None, function=gaussian2d, guess=None, plot=False):
     return result
 
 
+def _image_fit_single(img, grid_ravel, function, p0, param_count, return_model=False):
+    """
+    Fits a single raveled image for :meth:`image_fit()`.
+    Returns the rsquared, the fit parameters, and the errors for each of the parameters,
+    along with the fitted model over the full grid if ``return_model`` (else ``None``).
+    """
+    # Deal with nans.
+    defined = None
+    grid_fit = grid_ravel
+    undefined = np.isnan(img)
+    if np.any(undefined):
+        defined = np.logical_not(undefined)
+        img = img[defined]
+        grid_fit = grid_ravel[:, defined]
+
+    # Attempt fit.
+    fit_succeeded = True
+    popt = None
+    perr = None
+    model = None
+
+    try:
+        popt, pcov = curve_fit(function, grid_fit, img, ftol=1e-5, p0=p0,)
+        perr = np.sqrt(np.diag(pcov))
+    except RuntimeError:    # The fit failed if scipy says so.
+        fit_succeeded = False
+    else:                   # The fit failed if any of the parameters aren't finite.
+        if np.any(np.logical_not(np.isfinite(popt))):
+            fit_succeeded = False
+
+    if fit_succeeded:   # Calculate r2.
+        # Evaluate the model only once; the full grid is needed if plotting.
+        if return_model:
+            model = function(grid_ravel, *popt)
+            model_fit = model if defined is None else model[defined]
+        else:
+            model_fit = function(grid_fit, *popt)
+
+        ss_res = np.sum(np.square(img - model_fit))
+        ss_tot = np.var(img) * img.size
+        r2 = 1 - (ss_res / ss_tot)
+    else:               # r2 is nan and the fit parameters are the guess or nan.
+        popt = p0 if p0 is not None else np.full(param_count, np.nan)
+        r2 = np.nan
+        perr = np.nan
+
+    return r2, popt, perr, model
+
+
 def image_zernike_fit(images, grid, order=10, iterations=2, leastsquares=True, **kwargs):
     """
     Fits sets of Zernike polynomials to a stack of ``images``, up to a desired ``order``.
@@ -1405,6 +1783,9 @@ def blob_detect(
         The image to perform blob detection on.
     filter : {"dist_to_center", "max_amp"} OR None
         One of ``dist_to_center`` or ``max_amp``.
+        For ``max_amp``, the amplitude of each blob is integrated over a window about the
+        blob. Blobs whose window extends beyond the edge of the image are assigned zero
+        amplitude, such that blobs away from the edge are preferred.
     plot : bool
         Whether to show a debug plot.
     title : str
@@ -1455,27 +1836,34 @@ def blob_detect(
 
     # Sort blobs according to `filter`.
     if filter == "dist_to_center":
-        dist_to_center = [
-            np.linalg.norm(np.array(blob.pt) - np.array(img.shape[::-1]) / 2)
-            for blob in blobs
-        ]
+        points = np.array([blob.pt for blob in blobs])
+        dist_to_center = np.linalg.norm(points - np.array(img.shape[::-1]) / 2, axis=1)
         blobs = [blobs[np.argmin(dist_to_center)]]
     elif filter == "max_amp":
+        points = np.array([blob.pt for blob in blobs]).T
         bin_size = int(np.mean([blob.size for blob in blobs]))
-        for i, blob in enumerate(blobs):
-            # Try fails when blob is on edge of camera.
-            try:
-                blobs[i].response = float(
-                    img_8bit[
-                        np.ix_(
-                            int(blob.pt[1]) + np.arange(-bin_size, bin_size),
-                            int(blob.pt[0]) + np.arange(-bin_size, bin_size),
-                        )
-                    ].sum()
-                )
-            except Exception:
-                blobs[i].response = float(0)
-        blobs = [blobs[np.argmax([blob.response for blob in blobs])]]
+
+        # Integrate a window about each blob. Blobs on the edge of the camera are zeroed.
+        # img_8bit is an integer image, so take() clips to zero rather than nan; instead
+        # explicitly zero any window which leaves the image.
+        corners = points.astype(int) - bin_size
+        inside = np.all(
+            (corners >= 0)
+            & (corners + 2 * bin_size <= np.flip(img_8bit.shape)[:, np.newaxis]),
+            axis=0
+        )
+        responses = np.atleast_1d(take(
+            img_8bit,
+            corners,
+            2 * bin_size,
+            centered=False,
+            integrate=True,
+            clip=True
+        ))
+        responses[np.logical_not(inside)] = 0
+        for blob, response in zip(blobs, responses):
+            blob.response = float(response)
+        blobs = [blobs[np.argmax(responses)]]
 
     if plot:
         # Get blob statistics.
@@ -1515,6 +1903,137 @@ def blob_detect(
     return blobs, detector
 
 
+def _peak_detect(img, threshold=10, size=5):
+    """
+    Lightweight :meth:`blob_detect()` for sharp peaks: the local maxima within a ``size``
+    window above ``threshold`` (8-bit scale), centroided over their 3x3 neighborhood.
+    """
+    img = np.asarray(img, dtype=float)
+    img_min = np.amin(img)
+    img_max = np.amax(img)
+    if img_max <= img_min:
+        return []
+
+    # Find the local maxima above threshold, brightest first.
+    cutoff = img_min + (img_max - img_min) * threshold / (2 ** 8 - 1)
+    y, x = np.nonzero((img == maximum_filter(img, size=size)) & (img > cutoff))
+    order = np.argsort(-img[y, x], kind="stable")
+    points = np.vstack((x[order], y[order]))
+
+    # Refine with the centroid of each neighborhood (above its floor).
+    windows = np.atleast_3d(take(img, points, 3, clip=True))
+    windows = np.nan_to_num(windows - np.nanmin(windows, axis=(1, 2), keepdims=True))
+    shift = image_positions(windows)
+
+    return [
+        cv2.KeyPoint(float(px), float(py), float(size))
+        for (px, py) in (points + np.nan_to_num(shift)).T
+    ]
+
+
+def _match_ccoeff_fft(img, mask, cache=None):
+    """
+    ``cv2.matchTemplate(img, mask, cv2.TM_CCOEFF)`` via FFT, reusing the spectrum of
+    ``img`` stored in the ``cache`` dict if given. Small masks fall back to :mod:`cv2`.
+    """
+    if min(mask.shape) < 18:
+        return cv2.matchTemplate(img, mask, cv2.TM_CCOEFF)
+    if mask.shape[0] > img.shape[0] or mask.shape[1] > img.shape[1]:
+        raise ValueError(f"Mask of shape {mask.shape} is larger than image of shape {img.shape}.")
+
+    # The valid region does not wrap, so padding to the image size suffices.
+    shape = (next_fast_len(img.shape[0], real=True), next_fast_len(img.shape[1], real=True))
+
+    mask_zero = mask.astype(np.float32)
+    mask_zero -= np.mean(mask_zero)
+
+    if cache is not None and "spectrum" in cache:
+        img_spectrum = cache["spectrum"]
+    else:
+        img_spectrum = rfft2(img.astype(np.float32), shape, workers=-1)
+        if cache is not None:
+            cache["spectrum"] = img_spectrum
+
+    spectrum = rfft2(mask_zero, shape, workers=-1)
+    np.conj(spectrum, out=spectrum)
+    spectrum *= img_spectrum
+    result = irfft2(spectrum, shape, workers=-1)
+
+    return result[:(img.shape[0] - mask.shape[0] + 1), :(img.shape[1] - mask.shape[1] + 1)]
+
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _take_moments_numba(img, positions, size, fill):
+        """
+        Fused :meth:`take()` and :meth:`image_positions()` for the hone step of
+        :meth:`blob_array_detect()`. For ``size`` by ``size`` windows centered at
+        ``positions``, returns the unnormalized moments :math:`M_{00}`, :math:`M_{10}`,
+        and :math:`M_{01}` of shape ``(3, N)`` without gathering the windows.
+        Pixels outside ``img`` take the value ``fill``, like ``take(..., clip=True)``.
+        """
+        (w_y, w_x) = img.shape
+        count = positions.shape[1]
+        half = (size - 1) / 2
+        result = np.zeros((3, count))
+
+        for i in numba.prange(count):
+            m00 = m10 = m01 = 0.0
+
+            for d_y in range(size):
+                y = int(np.rint(positions[1, i] + (d_y - half)))
+
+                for d_x in range(size):
+                    x = int(np.rint(positions[0, i] + (d_x - half)))
+
+                    if 0 <= x < w_x and 0 <= y < w_y:
+                        value = float(img[y, x])
+                    else:
+                        value = fill
+
+                    m00 += value
+                    m10 += value * (d_x - half)
+                    m01 += value * (d_y - half)
+
+            result[0, i] = m00
+            result[1, i] = m10
+            result[2, i] = m01
+
+        return result
+
+
+# Template matchers are not thread safe, so each thread keeps its own.
+_cuda_matchers = threading.local()
+
+
+def _cuda_available():
+    """Whether :mod:`cv2` was built with CUDA and sees a device."""
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
+
+
+def _match_ccoeff_cuda(img_gpu, mask):
+    """
+    CUDA counterpart of :meth:`_match_ccoeff_fft()` for an 8-bit image that was
+    already uploaded to a :class:`cv2.cuda.GpuMat`, such that the image is uploaded
+    only once for several masks. Only the (small) result map is downloaded.
+    """
+    matchers = getattr(_cuda_matchers, "cache", None)
+    if matchers is None:
+        matchers = _cuda_matchers.cache = {}
+
+    key = mask.dtype.str
+    if key not in matchers:
+        matchers[key] = cv2.cuda.createTemplateMatching(cv2.CV_8UC1, cv2.TM_CCOEFF)
+
+    mask_gpu = cv2.cuda_GpuMat()
+    mask_gpu.upload(mask)
+
+    return matchers[key].match(img_gpu, mask_gpu).download()
+
+
 def blob_array_detect(
     img,
     size,
@@ -1522,6 +2041,7 @@ def blob_array_detect(
     orientation_check=True,
     dft_threshold=100,
     dft_padding=0,
+    dft_downsample=False,
     k=8,
     tol=0.1,
     plot=False,
@@ -1553,13 +2073,20 @@ def blob_array_detect(
         Used by :meth:`~slmsuite.hardware.cameraslms.FourierSLM.fourier_calibrate()`.
         See :meth:`~slmsuite.hardware.cameraslms.FourierSLM.make_rectangular_array()`.
     dft_threshold : float in [0, 255]
-        Minimum value of peak in blob detect of the DFT of ``img`` when ``orientation`` is ``None``.
-        Passed as keyword argument to :meth:`blob_detect` with keyword ``minThreshold``.
+        Minimum value of peak in the DFT of ``img`` when ``orientation`` is ``None``,
+        relative to the range of the DFT amplitude scaled to 8 bits.
     dft_padding : int
         Increases the dimensions of the padded ``img`` before the DFT is taken when ``orientation``
         is ``None``. Dimensions are increased by a factor of ``2 ** dft_padding``.
         Increasing this value increases the :math:`k`-space resolution of the DFT,
         and can improve orientation detection.
+    dft_downsample : bool
+        If ``True``, first attempt to find the orientation from the DFT of ``img``
+        downsampled by powers of two (to at most 1024 pixels along the largest dimension),
+        falling back to finer scales if too few peaks are found. This greatly reduces the
+        cost of the DFT for large images, but is only valid if the array pitch is well
+        above the Nyquist limit of the downsampled image, as aliasing can otherwise
+        produce an incorrect lattice. Defaults to ``False``.
     k : int
         Number of nearest neighbors to use for each point when lattice matching.
         Defaults to 8.
@@ -1596,57 +2123,80 @@ def blob_array_detect(
     # Otherwise, find a guess orientation.
     else:
         # 1) FFT to find array pitch and orientation.
-        # Take the largest dimension rounded down to nearest power of 2.
-        # FUTURE: clean this up to behave like other parts of the package.
-        fft_size = int(2 ** (np.floor(np.log2(np.max(np.shape(img)))) + dft_padding))
-        dft = np.abs(np.fft.fftshift(np.fft.fft2(img, s=[fft_size, fft_size])))
-
-        # 2) Detect and plot FFT peaks
-        # 2.1) Prepare some helper variables, mainly for filtering out the 0th order.
-        fft_blur_size = int(np.clip(fft_size/200, 1, 5))*2 + 1
-        downscaling = 1
-        dft_amp = None
-        zo_size = 8*fft_blur_size
-        if fft_size <= zo_size*4:
-            raise ValueError(f"Image of shape {img.shape} is too small to use with blob_array_detect.")
-        zo_x, zo_y = np.meshgrid(
-            np.linspace(-zo_size/2, zo_size/2, zo_size),
-            np.linspace(-zo_size/2, zo_size/2, zo_size)
-        )
-        zo_filter = gaussian2d([zo_x, zo_y], 0, 0, -1, 1, fft_blur_size/2, fft_blur_size/2)
-        points = []
-        blobs = None
-        i = 0
-
-        # 2.2) Look for peaks with progressively greater downscaled blurring. This helps
-        # to mitigate noise on the DFT peaks and enhance the most prominent peaks.
-        while fft_size / downscaling > zo_size*4:
-            dft_amp = cv2.GaussianBlur(dft, (fft_blur_size, fft_blur_size), fft_blur_size/4)
-
-            # Filter 0 order (dominates in the presence of a slowly varying background)
-            zo_i = int(fft_size/2/downscaling-zo_size/2)
-            zo_j = zo_i+zo_size
-            dft_amp[zo_i:zo_j, zo_i:zo_j] *= zo_filter
-
-            thresholdStep = 10
-            blobs, _ = blob_detect(
-                dft_amp,
-                minThreshold=dft_threshold,
-                thresholdStep=thresholdStep,
+        # The FFT dominates for large images, so optionally first attempt with a
+        # downsampled image. Relative to the DFT center, peaks stay in place on a
+        # correspondingly smaller DFT as long as the array pitch is well above the
+        # downsampled Nyquist limit. Fall back to finer scales if too few peaks are found.
+        dft_scales = [1]
+        while dft_downsample and max(np.shape(img)) / dft_scales[0] > 1024:
+            dft_scales.insert(0, 2 * dft_scales[0])
+
+        for dft_scale in dft_scales:
+            # Single precision halves the cost of the DFT and of the blurs below.
+            img_dft = img.astype(np.float32)
+            for _ in range(int(np.log2(dft_scale))):
+                img_dft = cv2.pyrDown(img_dft)
+
+            # Take the largest dimension rounded down to nearest power of 2.
+            # FUTURE: clean this up to behave like other parts of the package.
+            fft_size = int(2 ** (np.floor(np.log2(np.max(np.shape(img_dft)))) + dft_padding))
+
+            # The image is real, so only compute the non-redundant half of the spectrum.
+            # The other half of the amplitude is the mirror |F(-k)| = |F(k)|.
+            dft_half = np.abs(rfft2(img_dft, s=(fft_size, fft_size), workers=-1))
+            dft = np.empty((fft_size, fft_size), dtype=dft_half.dtype)
+            dft[:, :(fft_size // 2 + 1)] = dft_half
+            dft[:, (fft_size // 2 + 1):] = np.roll(
+                dft_half[::-1, (fft_size // 2 - 1):0:-1], 1, axis=0
             )
-            points += [np.array(blob.pt) * downscaling for blob in blobs]
+            dft = np.fft.fftshift(dft)
+
+            # 2) Detect and plot FFT peaks
+            # 2.1) Prepare some helper variables, mainly for filtering out the 0th order.
+            fft_blur_size = int(np.clip(fft_size/200, 1, 5))*2 + 1
+            downscaling = 1
+            dft_amp = None
+            zo_size = 8*fft_blur_size
+            if fft_size <= zo_size*4:
+                raise ValueError(f"Image of shape {img.shape} is too small to use with blob_array_detect.")
+            zo_x, zo_y = np.meshgrid(
+                np.linspace(-zo_size/2, zo_size/2, zo_size),
+                np.linspace(-zo_size/2, zo_size/2, zo_size)
+            )
+            zo_filter = gaussian2d([zo_x, zo_y], 0, 0, -1, 1, fft_blur_size/2, fft_blur_size/2)
+            points = np.zeros((0, 2))
+            blobs = None
+            i = 0
+
+            # 2.2) Look for peaks with progressively greater downscaled blurring. This helps
+            # to mitigate noise on the DFT peaks and enhance the most prominent peaks.
+            while fft_size / downscaling > zo_size*4:
+                dft_amp = cv2.GaussianBlur(dft, (fft_blur_size, fft_blur_size), fft_blur_size/4)
+
+                # Filter 0 order (dominates in the presence of a slowly varying background)
+                zo_i = int(fft_size/2/downscaling-zo_size/2)
+                zo_j = zo_i+zo_size
+                dft_amp[zo_i:zo_j, zo_i:zo_j] *= zo_filter
+
+                blobs = _peak_detect(dft_amp, threshold=dft_threshold, size=21)
+                points = np.vstack((
+                    points, np.reshape([blob.pt for blob in blobs], (-1, 2)) * downscaling
+                ))
+
+                # Exit if we've already got enough points.
+                if len(points) > 4 * (i+1):
+                    break
 
-            # Exit if we've already got enough points.
-            if len(points) > 4 * (i+1):
-                break
+                # Downscale so we can try to find peaks again with greater blurring.
+                if fft_size / downscaling > zo_size*4:
+                    if not fft_size / (2*downscaling) > zo_size*4:
+                        break
+                    dft = dft[0::2, 0::2] + dft[0::2, 1::2] + dft[1::2, 0::2] + dft[1::2, 1::2]
+                    downscaling *= 2
+                    i += 1
 
-            # Downscale so we can try to find peaks again with greater blurring.
-            if fft_size / downscaling > zo_size*4:
-                if not fft_size / (2*downscaling) > zo_size*4:
-                    break
-                dft = dft[0::2, 0::2] + dft[0::2, 1::2] + dft[1::2, 0::2] + dft[1::2, 1::2]
-                downscaling *= 2
-                i += 1
+            if len(points) >= 4:
+                break
 
         if len(points) < 4:
 
@@ -1697,9 +2247,7 @@ def blob_array_detect(
             return kNN
 
         # Get rid of the points closest to the center - these are noise on the 0th order.
-        points = np.array(points)
-
-        points_lengths = np.sqrt((points[:,0]-fft_size/2)**2 + (points[:,1]-fft_size/2)**2)
+        points_lengths = np.hypot(points[:,0]-fft_size/2, points[:,1]-fft_size/2)
         points = points[points_lengths > .5*np.mean(points_lengths), :]
         points = np.concatenate((points, np.array([[fft_size/2, fft_size/2]])))
 
@@ -1802,8 +2350,8 @@ def blob_array_detect(
             ax.grid()
             plt.show()
 
-        # 3.4) Convert to image space (dx = 1/dk)
-        M = fft_size*lv/(np.linalg.norm(lv, axis=0)**2)
+        # 3.4) Convert to image space (dx = 1/dk), undoing any downsampling.
+        M = dft_scale*fft_size*lv/(np.linalg.norm(lv, axis=0)**2)
 
         # Plot which diffraction orders we used
         if plot > 1:
@@ -1834,7 +2382,7 @@ def blob_array_detect(
             # Plot a red rectangle to show the extents of the zoom region
             rect = plt.Rectangle(
                 (float(xl[0]), float(yl[0])),
-                float(np.diff(xl)), float(np.diff(yl)),
+                float(xl[1] - xl[0]), float(yl[1] - yl[0]),
                 ec="r", fc="none"
             )
             axs[0].add_patch(rect)
@@ -1876,23 +2424,20 @@ def blob_array_detect(
 
     # 4) Make the array kernel for convolutional detection of the array center.
     # Make lists that we will use to make the kernel: the array...
-    x_list = np.arange(-(size[0] - 1) / 2.0, (size[0] + 1) / 2.0)
-    y_list = np.arange(-(size[1] - 1) / 2.0, (size[1] + 1) / 2.0)
-
-    x_centergrid, y_centergrid = np.meshgrid(x_list, y_list)
-    centers = np.vstack((x_centergrid.ravel(), y_centergrid.ravel()))
+    # (mgrid builds the (y, x) grids in a single buffer; flip to (x, y) rows.)
+    centers = np.mgrid[
+        -(size[1] - 1) / 2.0:(size[1] + 1) / 2.0,
+        -(size[0] - 1) / 2.0:(size[0] + 1) / 2.0,
+    ][::-1].reshape(2, -1)
 
     # ...and the array padded by one (penalize the border to avoid off-by-one errors).
     pad = 1
     p = int(pad * 2)
 
-    x_list_larger = np.arange(-(size[0] + p - 1) / 2.0, (size[0] + p + 1) / 2.0)
-    y_list_larger = np.arange(-(size[1] + p - 1) / 2.0, (size[1] + p + 1) / 2.0)
-
-    x_centergrid_larger, y_centergrid_larger = np.meshgrid(x_list_larger, y_list_larger)
-    centers_larger = np.vstack(
-        (x_centergrid_larger.ravel(), y_centergrid_larger.ravel())
-    )
+    centers_larger = np.mgrid[
+        -(size[1] + p - 1) / 2.0:(size[1] + p + 1) / 2.0,
+        -(size[0] + p - 1) / 2.0:(size[0] + p + 1) / 2.0,
+    ][::-1].reshape(2, -1)
 
     # If we're not sure about how things are flipped, consider alternatives...
     if size[0] != size[1] and orientation is None:
@@ -1901,171 +2446,242 @@ def blob_array_detect(
     else:
         M_options = [M]
     results = []
-    # Iterate through these alternatives.
+
+    # If possible, upload the image to the GPU once for all the alternatives.
+    # Otherwise, share the spectrum of the image across the alternatives.
+    img_gpu = None
+    match_cache = {}
+    if _cuda_available():
+        img_gpu = cv2.cuda_GpuMat()
+        img_gpu.upload(img_8bit)
+
+    # The kernel is only resolved to the pixel, so single precision suffices until the hone.
+    centers_f32 = centers.astype(np.float32)
+    centers_larger_f32 = centers_larger.astype(np.float32)
+
+    # First find the geometry of the kernel for each alternative...
     for M_trial in M_options:
         # Find the position of the centers for this trial matrix.
-        rotated_centers = np.matmul(M_trial, centers)
-        rotated_centers_larger = np.matmul(M_trial, centers_larger)
-
-        # Make the kernel
-        max_pitch = int(
-            np.amax([np.linalg.norm(M_trial[:, 0]), np.linalg.norm(M_trial[:, 1])])
-        )
-        mask = np.zeros(
-            (
-                int(
-                    np.amax(rotated_centers_larger[1, :])
-                    - np.amin(rotated_centers_larger[1, :])
-                    + max_pitch
-                ),
-                int(
-                    np.amax(rotated_centers_larger[0, :])
-                    - np.amin(rotated_centers_larger[0, :])
-                    + max_pitch
-                ),
-            )
+        M_trial_f32 = np.asarray(M_trial, dtype=np.float32)
+        rotated_centers = np.matmul(M_trial_f32, centers_f32)
+        rotated_centers_larger = np.matmul(M_trial_f32, centers_larger_f32)
+
+        max_pitch = int(np.amax(np.linalg.norm(M_trial, axis=0)))
+        mask_shape = (
+            int(
+                np.amax(rotated_centers_larger[1, :])
+                - np.amin(rotated_centers_larger[1, :])
+                + max_pitch
+            ),
+            int(
+                np.amax(rotated_centers_larger[0, :])
+                - np.amin(rotated_centers_larger[0, :])
+                + max_pitch
+            ),
         )
 
-        rotated_centers += np.flip(mask.shape)[:, np.newaxis] / 2
-        rotated_centers_larger += np.flip(mask.shape)[:, np.newaxis] / 2
+        rotated_centers += np.flip(mask_shape)[:, np.newaxis] / 2
+        rotated_centers_larger += np.flip(mask_shape)[:, np.newaxis] / 2
 
-        # Pixels to use for the kernel.
-        x_array = np.rint(rotated_centers[0, :]).astype(int)
-        y_array = np.rint(rotated_centers[1, :]).astype(int)
+        results.append({
+            "M": M_trial,
+            "max_pitch": max_pitch,
+            "mask_shape": mask_shape,
+            "rotated_centers": rotated_centers,
+            "rotated_centers_larger": rotated_centers_larger,
+        })
 
-        x_larger = np.rint(rotated_centers_larger[0, :]).astype(int)
-        y_larger = np.rint(rotated_centers_larger[1, :]).astype(int)
+    # ...such that one buffer can hold the kernel of any alternative. A kernel larger
+    # than the image cannot be matched, so the buffer is clamped to the image.
+    mask_buffer = np.empty(
+        (
+            min(img_8bit.shape[0], max(result["mask_shape"][0] for result in results)),
+            min(img_8bit.shape[1], max(result["mask_shape"][1] for result in results)),
+        ),
+        dtype=np.uint8
+    )
 
-        # Make a mask with negative power at the border, positive
-        # at the array, with integrated intensity of 0.
-        area = size[0] * size[1]
-        perimeter = 2 * (size[0] + size[1]) + 4
+    # Make a mask with negative power at the border, positive
+    # at the array, with integrated intensity of 0.
+    area = size[0] * size[1]
+    perimeter = 2 * (size[0] + size[1]) + 4
 
-        mask[y_larger, x_larger] = -area/perimeter
-        mask[y_array, x_array] = 1
+    # The mask takes only three levels, so write it directly in 8-bit as
+    # _make_8bit() would scale it: -area/perimeter -> 0, 0 -> background, 1 -> 255.
+    ratio = area / perimeter
+    background = int(ratio / (1 + ratio) * (2 ** 8 - 1))
 
-        mask = _make_8bit(mask)
+    for result in results:
+        max_val = 0
+        max_loc = [0, 0]
 
-        # 5) Do the autocorrelation
-        try:
-            res = cv2.matchTemplate(img_8bit, mask, cv2.TM_CCOEFF)
-            _, max_val, _, max_loc = cv2.minMaxLoc(res)
-        except:
-            max_val = 0
-            max_loc = [0, 0]
+        # Skip kernels larger than the image, which cannot be matched.
+        if (
+            result["mask_shape"][0] <= img_8bit.shape[0]
+            and result["mask_shape"][1] <= img_8bit.shape[1]
+        ):
+            mask = mask_buffer[:result["mask_shape"][0], :result["mask_shape"][1]]
 
-        b_fixed = (
-            np.array(max_loc)[:, np.newaxis] + np.flip(mask.shape)[:, np.newaxis] / 2
-        )
+            # Pixels to use for the kernel.
+            x_array = np.rint(result["rotated_centers"][0, :]).astype(int)
+            y_array = np.rint(result["rotated_centers"][1, :]).astype(int)
+
+            x_larger = np.rint(result["rotated_centers_larger"][0, :]).astype(int)
+            y_larger = np.rint(result["rotated_centers_larger"][1, :]).astype(int)
 
-        # Parity check
-        if orientation is None and orientation_check:
+            mask.fill(background)
+            mask[y_larger, x_larger] = 0
+            mask[y_array, x_array] = 2 ** 8 - 1
+
+            # 5) Do the autocorrelation
             try:
-                cam_array_ind = np.ix_(
-                    max_loc[1] + np.arange(mask.shape[0]),
-                    max_loc[0] + np.arange(mask.shape[1]),
-                )
-                match = img_8bit[cam_array_ind]
-
-                # TODO: replace with take
-                wmask = 0.2
-                w = np.max([1, int(wmask * max_pitch)])
-                edge = np.arange(-w, w + 1)
-
-                integration_x, integration_y = np.meshgrid(edge, edge)
-
-                rotated_integration_x = np.rint(np.add(
-                    integration_x.ravel()[:, np.newaxis].T,
-                    rotated_centers[:][0][:, np.newaxis],
-                )).astype(int)
-                rotated_integration_y = np.rint(np.add(
-                    integration_y.ravel()[:, np.newaxis].T,
-                    rotated_centers[:][1][:, np.newaxis],
-                )).astype(int)
-
-                spotpowers = np.reshape(
-                    np.sum(match[rotated_integration_y, rotated_integration_x], 1),
-                    np.flip(size),
-                )
+                if img_gpu is None:
+                    res = _match_ccoeff_fft(img_8bit, mask, match_cache)
+                else:
+                    res = _match_ccoeff_cuda(img_gpu, mask)
+                _, max_val, _, max_loc = cv2.minMaxLoc(res)
+            except:
+                max_val = 0
+                max_loc = [0, 0]
+
+        result["max_val"] = max_val
+        result["max_loc"] = max_loc
+        result["b"] = (
+            np.array(max_loc)[:, np.newaxis]
+            + np.flip(result["mask_shape"])[:, np.newaxis] / 2
+        )
 
-                # Find the two dimmest pixels.
-                spotbooleans = spotpowers <= np.sort(spotpowers.ravel())[1]
+    def parity_check(result):
+        """Returns M corrected such that the missing corner spots are where we expect."""
+        max_loc = result["max_loc"]
+        mask_shape = result["mask_shape"]
+        rotated_centers = result["rotated_centers"]
 
-                assert np.sum(spotbooleans) == 2
+        # The matched window is a valid placement of the mask, so view it directly.
+        match = img_8bit[
+            max_loc[1]:(max_loc[1] + mask_shape[0]),
+            max_loc[0]:(max_loc[0] + mask_shape[1]),
+        ]
 
-                # Find whether the corners are dimmest.
-                corners = spotbooleans[[-1, -1, 0, 0], [-1, 0, 0, -1]]
+        # Integrate a window about each spot, using the integral image to
+        # sum each window with four lookups.
+        wmask = 0.2
+        w = np.max([1, int(wmask * result["max_pitch"])])
+
+        # Round the window origin as rint(center - w), as for the per-pixel windows.
+        x0 = np.rint(rotated_centers[0, :] - w).astype(int)
+        y0 = np.rint(rotated_centers[1, :] - w).astype(int)
+        x1 = x0 + 2 * w + 1
+        y1 = y0 + 2 * w + 1
+
+        if (
+            np.amin(x0) < 0 or np.amin(y0) < 0
+            or np.amax(x1) > match.shape[1] or np.amax(y1) > match.shape[0]
+        ):
+            raise ValueError("Parity check windows exceed the matched region.")
+
+        match_integral = cv2.integral(match, sdepth=cv2.CV_64F)
+        spotpowers = np.reshape(
+            match_integral[y1, x1] - match_integral[y0, x1]
+            - match_integral[y1, x0] + match_integral[y0, x0],
+            np.flip(size),
+        )
 
-                assert np.sum(corners) == 1
+        # Find the two dimmest pixels.
+        spotbooleans = spotpowers <= np.partition(spotpowers.ravel(), 1)[1]
 
-                # We want a dim corner at -1, -1.
-                rotation_parity = np.where(corners)[0][0]
-                spotbooleans_rotated = np.rot90(spotbooleans, rotation_parity)
+        assert np.sum(spotbooleans) == 2
 
-                theta = rotation_parity * np.pi / 2
-                c = np.cos(theta)
-                s = np.sin(theta)
-                rotation = np.array([[c, -s], [s, c]])
+        # Find whether the corners are dimmest.
+        corners = spotbooleans[[-1, -1, 0, 0], [-1, 0, 0, -1]]
 
-                # Look for the second missing spot.
-                flip_parity = (
-                    int(spotbooleans_rotated[-1, -2]) -
-                    int(spotbooleans_rotated[-2, -1])
-                )
+        assert np.sum(corners) == 1
 
-                assert abs(flip_parity) == 1
+        # We want a dim corner at -1, -1.
+        rotation_parity = np.where(corners)[0][0]
+        spotbooleans_rotated = np.rot90(spotbooleans, rotation_parity)
 
-                if flip_parity == 1:
-                    flip = np.array([[1, 0], [0, 1]])
-                else:
-                    flip = np.array([[0, 1], [1, 0]])
+        theta = rotation_parity * np.pi / 2
+        c = np.cos(theta)
+        s = np.sin(theta)
+        rotation = np.array([[c, -s], [s, c]])
+
+        # Look for the second missing spot.
+        flip_parity = (
+            int(spotbooleans_rotated[-1, -2]) -
+            int(spotbooleans_rotated[-2, -1])
+        )
+
+        assert abs(flip_parity) == 1
 
-                M_fixed = np.matmul(M_trial, np.matmul(rotation, flip))
-                parity_success = True
-            except Exception as e:
-                M_fixed = M_trial
-                parity_success = False
+        if flip_parity == 1:
+            flip = np.array([[1, 0], [0, 1]])
         else:
-            M_fixed = M_trial
-            parity_success = True
+            flip = np.array([[0, 1], [1, 0]])
 
-        results.append((max_val, b_fixed, M_fixed, parity_success))
+        return np.matmul(result["M"], np.matmul(rotation, flip))
 
+    # Prefer the alternative with the best match, but prefer satisfying the parity
+    # check above all. Thus, the parity check only runs on the runner-up if the best
+    # match fails it.
     if len(results) == 1:
-        index = 0
+        order = [0]
     else:
-        # Default to max_val if the parity check results in the same thing.
-        if results[0][3] == results[1][3]:
-            index = int(results[1][0] > results[0][0])
-        else:
-            # Index is the one that satisfied the parity check
-            index = int(results[1][3])
+        best = int(results[1]["max_val"] > results[0]["max_val"])
+        order = [best, 1 - best]
+
+    index = order[0]
+    M_fixed = results[index]["M"]
+    if orientation is None and orientation_check:
+        for i in order:
+            try:
+                M_fixed = parity_check(results[i])
+                index = i
+                break
+            except Exception:
+                pass
 
-    orientation = {"M": results[index][2], "b": results[index][1]}
+    mask_shape = results[index]["mask_shape"]
+    max_pitch = results[index]["max_pitch"]
+
+    orientation = {"M": M_fixed, "b": results[index]["b"]}
 
     # Hone the center of our fit by averaging the positional deviations of spots.
     # We do this multiple times to allow outliers (1 std error above) to stabilize.
     # FUTURE: Use a more physics-based psf, optimize for speed, maybe remove_field.
     hone_count = 3
     region_fraction = 1
+
+    # The orientation changes every iteration, so recompute the array positions
+    # into one buffer, which is also reused for plotting.
+    guess_positions = np.empty(centers.shape)
+
     for _ in range(hone_count):
-        guess_positions = np.matmul(orientation["M"], centers) + orientation["b"]
+        np.matmul(orientation["M"], centers, out=guess_positions)
+        guess_positions += orientation["b"]
 
         # Calculate a point spread function (psf) integration window size.
         psf = 2 * int(np.floor(np.amin(np.amax(np.abs(orientation["M"]), axis=0))) / 2) + 1
         psf = np.max([3, psf])
 
-        # Grab windows (sized by psf) about the guess_positions.
-        regions = take(
-            img, guess_positions, psf, centered=True, integrate=False, clip=True
-        )
-        region_fraction = np.sum(regions) / np.sum(img)
+        # Get the first order moment in windows (sized by psf) about the guess_positions.
+        if _numba_dtype(img.dtype):
+            # Reduce each window in place rather than gathering them.
+            fill = np.nan if np.issubdtype(img.dtype, np.inexact) else 0
+            moments = _take_moments_numba(img, guess_positions, psf, fill)
+            region_fraction = np.sum(moments[0]) / np.sum(img)
+            positions = moments[1:] * _reciprocal(moments[0])
+        else:
+            regions = take(
+                img, guess_positions, psf, centered=True, integrate=False, clip=True
+            )
+            region_fraction = np.sum(regions) / np.sum(img)
+            positions = image_positions(regions)
 
-        # Get the first order moment rint each of the guess windows.
-        shift = image_positions(regions) - (guess_positions - np.rint(guess_positions))
+        shift = positions - (guess_positions - np.rint(guess_positions))
 
         # Remove outliers.
-        shift_error = np.sqrt(np.square(shift[0, :]) + np.square(shift[1, :]))
+        shift_error = np.hypot(shift[0, :], shift[1, :])
         thresh = np.mean(shift_error) + np.std(shift_error)
         shift[:, shift_error > thresh] = np.nan
 
@@ -2074,7 +2690,7 @@ def blob_array_detect(
         orientation = fit_affine(centers, true_positions, orientation)
 
     # Warn the user if the mask was >= (or close to) camera size.
-    if np.any(mask.shape > 0.95 * np.array(img_8bit.shape)):
+    if np.any(mask_shape > 0.95 * np.array(img_8bit.shape)):
         warnings.warn(
             "The computed Fourier grid size exceeds or approaches the camera size; "
             "calibration results may be improperly centered as a result."
@@ -2095,7 +2711,8 @@ def blob_array_detect(
 
     if plot:
         array_center = orientation["b"]
-        true_centers = np.matmul(orientation["M"], centers) + orientation["b"]
+        true_centers = np.matmul(orientation["M"], centers, out=guess_positions)
+        true_centers += orientation["b"]
 
         showmatch = False
 
@@ -2121,9 +2738,12 @@ def blob_array_detect(
             x[:-2], y[:-2], facecolors="none", edgecolors="r", marker="o", s=80, linewidths=0.5
         )
 
-        # for i, ctr in enumerate(true_centers.T):
-        #     if i < 2 or i > len(true_centers.T) - 3:
-        #         axs[1].annotate(i, (ctr[0] + 4, ctr[1] - 4), c="r", size="x-small")
+        # Label the first and last two spots, indexing them directly.
+        spot_count = true_centers.shape[1]
+        for i in sorted({0, 1, spot_count - 2, spot_count - 1} & set(range(spot_count))):
+            axs[1].annotate(
+                i, (true_centers[0, i] + 4, true_centers[1, i] - 4), c="r", size="x-small"
+            )
 
         axs[1].scatter(array_center[0], array_center[1], c="r", marker="x", s=10)
         axs[1].set_title("Result - Zoom")
@@ -2141,14 +2761,18 @@ def blob_array_detect(
         # Plot a red rectangle to show the extents of the zoom region
         rect = plt.Rectangle(
             (float(xl[0]), float(yl[0])),
-            float(np.diff(xl)), float(np.diff(yl)),
+            float(xl[1] - xl[0]), float(yl[1] - yl[0]),
             ec="r", fc="none"
         )
         axs[0].add_patch(rect)
         axs[0].set_title("Result - Full")
 
         if showmatch:
-            axs[2].imshow(match)
+            max_loc = results[index]["max_loc"]
+            axs[2].imshow(img_8bit[
+                max_loc[1]:(max_loc[1] + mask_shape[0]),
+                max_loc[0]:(max_loc[0] + mask_shape[1]),
+            ])
             axs[2].set_title("Result - Match")
 
         # Handle xy labels.
@@ -2181,15 +2805,25 @@ def _make_8bit(img):
     ndarray
         img as an 8-bit image.
     """
-    img = img.astype(float)
+    # Single precision suffices for 8 bits of output, and is exact for 16-bit sensors.
+    img = np.array(img, dtype=np.float32)
 
     img -= np.amin(img)
     max = np.amax(img)
-    if max > 0: img = img / max * (2 ** 8 - 1)
+    if max > 0: img *= (2 ** 8 - 1) / max
 
     return img.astype(np.uint8)
 
 
+# np.rot90(img, k) expressed as (transpose, sy, sx); see get_orientation_transformation().
+_ROT90_TRANSFORMS = {
+    0: (False, 1, 1),
+    1: (True, 1, -1),
+    2: (False, -1, -1),
+    3: (True, -1, 1),
+}
+
+
 def get_orientation_transformation(rot="0", fliplr=False, flipud=False):
     """
     Compile a transformation lambda from simple rotates and flips.
@@ -2210,20 +2844,32 @@ def get_orientation_transformation(rot="0", fliplr=False, flipud=False):
     Returns
     -------
     function (array_like) -> numpy.ndarray
-        Compiled image transformation.
+        Compiled image transformation. The result is a view of the input, so callers
+        which need contiguous memory should copy it.
     """
-    transforms = list()
-
-    if fliplr == True:
-        transforms.append(np.fliplr)
-    if flipud == True:
-        transforms.append(np.flipud)
-
+    # Every combination reduces to flips of the input axes and an optional transpose:
+    # img -> swapaxes(img[::sy, ::sx]) if transpose else img[::sy, ::sx].
     if rot == "90" or rot == 1:
-        transforms.append(lambda img: np.rot90(img, 1))
+        transpose, sy, sx = _ROT90_TRANSFORMS[1]
     elif rot == "180" or rot == 2:
-        transforms.append(lambda img: np.rot90(img, 2))
+        transpose, sy, sx = _ROT90_TRANSFORMS[2]
     elif rot == "270" or rot == 3:
-        transforms.append(lambda img: np.rot90(img, 3))
+        transpose, sy, sx = _ROT90_TRANSFORMS[3]
+    else:
+        transpose, sy, sx = _ROT90_TRANSFORMS[0]
 
-    return reduce(lambda f, g: lambda x: f(g(x)), transforms, lambda x: x)
+    # The flips act on the rotated image, so act on the other input axis if transposed.
+    if flipud == True:
+        if transpose:   sx = -sx
+        else:           sy = -sy
+    if fliplr == True:
+        if transpose:   sy = -sy
+        else:           sx = -sx
+
+    # Return a single strided view, without copying the image.
+    if transpose:
+        return lambda img: np.swapaxes(np.asarray(img)[::sy, ::sx], 0, 1)
+    elif sy == 1 and sx == 1:
+        return lambda img: img
+    else:
+        return lambda img: np.asarray(img)[::sy, ::sx]
@@ -0,0 +1,81 @@
+"""
+Regression tests for :mod:`slmsuite.holography.analysis`.
+"""
+import warnings
+
+import numpy as np
+import pytest
+
+from slmsuite.holography import analysis
+
+
+def _rotation(theta):
+    return np.array([[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]])
+
+
+def _spot_array(shape, size, M, b, sigma, noise=0.02, seed=0):
+    """Renders a ``size`` array of gaussian spots at ``M @ x + b`` onto ``shape``."""
+    img = np.zeros(shape)
+    r = int(4 * sigma) + 1
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+
+    xs = np.arange(size[0]) - (size[0] - 1) / 2
+    ys = np.arange(size[1]) - (size[1] - 1) / 2
+    for yv in ys:
+        for xv in xs:
+            p = M @ np.array([xv, yv]) + b
+            cx, cy = int(round(p[0])), int(round(p[1]))
+            img[cy - r:cy + r + 1, cx - r:cx + r + 1] += np.exp(
+                -((dx + cx - p[0]) ** 2 + (dy + cy - p[1]) ** 2) / (2 * sigma ** 2)
+            )
+
+    return img + noise * np.random.default_rng(seed).random(shape)
+
+
+def _assert_same_lattice(M_fit, M, atol):
+    """Without the parity check, the lattice vectors are only known up to order and sign."""
+    for column in M_fit.T:
+        assert min(
+            np.linalg.norm(column - s * other) for other in M.T for s in (-1, 1)
+        ) < atol
+
+
+@pytest.mark.parametrize("pitch", [3.5, 8])
+def test_blob_array_detect_small_pitch_large_image(pitch):
+    # Small pitches on large images alias if the DFT is downsampled.
+    M = pitch * _rotation(0.07)
+    b = np.array([1224.0, 1024.0])
+    size = (int(1800 / pitch), int(1400 / pitch))
+    img = _spot_array((2048, 2448), size, M, b, sigma=max(0.7, pitch / 6))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        orientation = analysis.blob_array_detect(img, size, orientation_check=False)
+
+    _assert_same_lattice(orientation["M"], M, atol=0.05)
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16])
+def test_image_normalization_saturated_frame(dtype):
+    # A saturated frame sums beyond 2**32, and must match numpy's sum and dtype.
+    images = np.full((2, 2048, 2448), np.iinfo(dtype).max, dtype=dtype)
+    expected = np.sum(images, axis=(1, 2))
+
+    normalization = analysis.image_normalization(images)
+
+    assert normalization.dtype == expected.dtype
+    np.testing.assert_array_equal(normalization, expected)
+
+
+def test_blob_detect_max_amp_ignores_edge_blob():
+    # The brighter blob is on the edge of the image, so its window leaves the image.
+    y, x = np.mgrid[:200, :300]
+    img = (
+        100 * np.exp(-((x - 150) ** 2 + (y - 100) ** 2) / 8)
+        + 250 * np.exp(-((x - 298) ** 2 + (y - 100) ** 2) / 8)
+    )
+
+    blobs, _ = analysis.blob_detect(img, filter="max_amp")
+
+    assert len(blobs) == 1
+    np.testing.assert_allclose(blobs[0].pt, (150, 100), atol=1)